@@ -5,12 +5,14 @@ Production Secure Version
 
 import os
 import secrets
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.connection import SessionLocal
+from database.connection import get_db
 from database.models import User, UsageTracking, DebateHistory
+from auth.routes import invalidate_user_cache
 
 router = APIRouter()
 security = HTTPBasic()
@@ -27,18 +29,6 @@ if not ADMIN_USERNAME or not ADMIN_PASSWORD:
     raise RuntimeError("Admin credentials not set in environment variables.")
 
 
-# ============================
-# DATABASE DEPENDENCY
-# ============================
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # ============================
 # VERIFY ADMIN
 # ============================
@@ -61,29 +51,32 @@ def verify_admin(credentials: HTTPBasicCredentials = Depends(security)):
 # ============================
 
 @router.get("/shadow-admin/users")
-def admin_get_users(
-    db: Session = Depends(get_db),
+async def admin_get_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_admin)
 ):
-    users = db.query(User).all()
-    result = []
-
-    for u in users:
-        tracking = db.query(UsageTracking).filter_by(user_id=u.id).first()
-
-        result.append({
-            "id": u.id,
-            "username": u.username,
-            "email": u.email,
-            "plan": u.plan,
-            "is_active": u.is_active,
-            "created_at": str(u.created_at),
-            "debates_today": tracking.debates_today if tracking else 0,
-            "debates_this_month": tracking.debates_this_month if tracking else 0,
-            "total_debates": tracking.total_debates if tracking else 0,
-        })
+    # Plain column rows via one outer join — no ORM objects to hydrate
+    rows = (await db.execute(
+        select(
+            User.id,
+            User.username,
+            User.email,
+            User.plan,
+            User.is_active,
+            User.created_at,
+            func.coalesce(UsageTracking.debates_today, 0).label("debates_today"),
+            func.coalesce(UsageTracking.debates_this_month, 0).label("debates_this_month"),
+            func.coalesce(UsageTracking.total_debates, 0).label("total_debates"),
+        )
+        .outerjoin(UsageTracking, UsageTracking.user_id == User.id)
+        .order_by(User.id)
+        .offset(skip)
+        .limit(limit)
+    )).mappings().all()
 
-    return result
+    return [dict(row) for row in rows]
 
 
 # ============================
@@ -91,10 +84,10 @@ def admin_get_users(
 # ============================
 
 @router.post("/shadow-admin/upgrade")
-def admin_upgrade_user(
+async def admin_upgrade_user(
     username: str,
     plan: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_admin)
 ):
     if plan not in ["free", "pro", "enterprise"]:
@@ -103,7 +96,7 @@ def admin_upgrade_user(
             detail="Invalid plan. Use: free | pro | enterprise"
         )
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
 
     if not user:
         raise HTTPException(
@@ -113,7 +106,8 @@ def admin_upgrade_user(
 
     old_plan = user.plan
     user.plan = plan
-    db.commit()
+    await db.commit()
+    await invalidate_user_cache()
 
     return {
         "message": f"✅ {username} upgraded from {old_plan} → {plan}",
@@ -127,12 +121,12 @@ def admin_upgrade_user(
 # ============================
 
 @router.post("/shadow-admin/disable")
-def admin_disable_user(
+async def admin_disable_user(
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_admin)
 ):
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
 
     if not user:
         raise HTTPException(
@@ -141,7 +135,8 @@ def admin_disable_user(
         )
 
     user.is_active = False
-    db.commit()
+    await db.commit()
+    await invalidate_user_cache()
 
     return {"message": f"🚫 {username} has been disabled."}
 
@@ -151,23 +146,21 @@ def admin_disable_user(
 # ============================
 
 @router.get("/shadow-admin/stats")
-def admin_stats(
-    db: Session = Depends(get_db),
+async def admin_stats(
+    db: AsyncSession = Depends(get_db),
     _: bool = Depends(verify_admin)
 ):
-    total_users = db.query(User).count()
-    total_debates = db.query(DebateHistory).count()
-
-    free_users = db.query(User).filter(User.plan == "free").count()
-    pro_users = db.query(User).filter(User.plan == "pro").count()
-    enterprise = db.query(User).filter(User.plan == "enterprise").count()
+    plan_counts = dict((await db.execute(
+        select(User.plan, func.count(User.id)).group_by(User.plan)
+    )).all())
+    total_debates = await db.scalar(select(func.count(DebateHistory.id)))
 
     return {
-        "total_users": total_users,
+        "total_users": sum(plan_counts.values()),
         "total_debates": total_debates,
         "plan_breakdown": {
-            "free": free_users,
-            "pro": pro_users,
-            "enterprise": enterprise,
+            "free": plan_counts.get("free", 0),
+            "pro": plan_counts.get("pro", 0),
+            "enterprise": plan_counts.get("enterprise", 0),
         }
     }
\ No newline at end of file
@@ -1,6 +1,14 @@
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# OWASP's PBKDF2-HMAC-SHA256 recommendation; ~200 ms per verify on a current x86 core,
+# inside the 500 ms login budget. Older hashes keep verifying at the rounds they were created with.
+PBKDF2_ROUNDS = 600000
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import hashlib
+import time
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import jwt
 
-from database.connection import SessionLocal
+from database.connection import get_db
+from database.redis_client import redis_client
 from database.models import User
 from auth.hashing import hash_password, verify_password
+from services.login_limiter import LoginLimiter
 from config import SECRET_KEY, ALGORITHM
 
 # ============================
@@ -19,17 +26,33 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Validated tokens -> (detached User, token exp, cache version). Keyed by token hash, never the raw token.
+USER_CACHE_TTL = 30
+_user_cache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL)
 
-# ============================
-# DATABASE DEPENDENCY
-# ============================
+# Bumped on invalidation so every worker drops its entries (needs REDIS_URL)
+USER_CACHE_VERSION_KEY = "user_cache:version"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Recent successful logins -> issued token, so SPA re-logins skip password hashing
+LOGIN_CACHE_TTL = 60
+_login_cache = TTLCache(maxsize=10000, ttl=LOGIN_CACHE_TTL)
+
+
+async def _user_cache_version() -> int:
+    if redis_client is None:
+        return 0
+    return int(await redis_client.get(USER_CACHE_VERSION_KEY) or 0)
+
+
+async def invalidate_user_cache():
+    """
+    Drop cached users so admin plan/status changes apply on the next request.
+    Without Redis this only clears the current process; other workers catch up within USER_CACHE_TTL.
+    """
+    _user_cache.clear()
+
+    if redis_client is not None:
+        await redis_client.incr(USER_CACHE_VERSION_KEY)
 
 
 # ============================
@@ -48,11 +71,11 @@ def create_access_token(data: dict):
 # ============================
 
 @router.post("/register")
-def register(username: str, email: str, password: str, db: Session = Depends(get_db)):
+async def register(username: str, email: str, password: str, db: AsyncSession = Depends(get_db)):
 
-    existing_user = db.query(User).filter(
-        (User.username == username) | (User.email == email)
-    ).first()
+    existing_user = await db.scalar(
+        select(User).where((User.username == username) | (User.email == email))
+    )
 
     if existing_user:
         raise HTTPException(
@@ -63,12 +86,12 @@ def register(username: str, email: str, password: str, db: Session = Depends(get
     new_user = User(
         username=username,
         email=email,
-        hashed_password=hash_password(password)
+        hashed_password=await asyncio.to_thread(hash_password, password)
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return {"message": "User registered successfully"}
 
@@ -78,17 +101,38 @@ def register(username: str, email: str, password: str, db: Session = Depends(get
 # ============================
 
 @router.post("/login")
-def login(
+async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
 
-    user = db.query(User).filter(User.username == form_data.username).first()
-
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-
-    access_token = create_access_token({"sub": user.username})
+    # No client address on e.g. unix-socket deployments
+    client_ip = request.client.host if request.client else "unknown"
+    limiter = LoginLimiter(client_ip, form_data.username)
+    await limiter.check()
+
+    # Keyed hash so the cache never holds anything password-equivalent
+    key = hashlib.blake2b(
+        f"{form_data.username}\0{form_data.password}".encode(),
+        key=SECRET_KEY.encode()[:64],
+        digest_size=16,
+    ).digest()
+    access_token = _login_cache.get(key)
+
+    if access_token is None:
+        user = await db.scalar(select(User).where(User.username == form_data.username))
+
+        # Hashing is CPU-bound — keep it off the event loop
+        if not user or not await asyncio.to_thread(
+            verify_password, form_data.password, user.hashed_password
+        ):
+            await limiter.record_failure()
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+
+        await limiter.reset()
+        access_token = create_access_token({"sub": user.username})
+        _login_cache[key] = access_token
 
     return {
         "access_token": access_token,
@@ -100,9 +144,9 @@ def login(
 # CURRENT USER (TOKEN VERIFY)
 # ============================
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
 
     credentials_exception = HTTPException(
@@ -110,19 +154,38 @@ def get_current_user(
         detail="Invalid authentication credentials"
     )
 
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    version = await _user_cache_version()
+    cached = _user_cache.get(key)
+
+    if cached is not None:
+        user, exp, cached_version = cached
+        if exp > time.time() and cached_version == version:
+            return await db.merge(user, load=False)
+        _user_cache.pop(key, None)
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token,
+            SECRET_KEY,
+            algorithms=[ALGORITHM],
+            options={"require": ["exp", "sub"]},
+        )
         username: str = payload.get("sub")
 
         if username is None:
             raise credentials_exception
 
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
 
     if user is None:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    # Cache a detached snapshot so commits in this session can't expire it
+    db.expunge(user)
+    _user_cache[key] = (user, payload["exp"], version)
+
+    return await db.merge(user, load=False)
\ No newline at end of file
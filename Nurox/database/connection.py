@@ -1,6 +1,6 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,22 +11,34 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     DATABASE_URL = "sqlite:///./nurox.db"
 
+# Async drivers: asyncpg for Postgres, aiosqlite for SQLite
+for prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+    if DATABASE_URL.startswith(prefix):
+        DATABASE_URL = "postgresql+asyncpg://" + DATABASE_URL[len(prefix):]
+
+if DATABASE_URL.startswith("sqlite://"):
+    DATABASE_URL = "sqlite+aiosqlite://" + DATABASE_URL[len("sqlite://"):]
+
 # Special handling for SQLite
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
+    engine = create_async_engine(DATABASE_URL)
 else:
-    engine = create_engine(
+    engine = create_async_engine(
         DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
         pool_pre_ping=True  # important for production
     )
 
-SessionLocal = sessionmaker(
-    autocommit=False,
+AsyncSessionLocal = async_sessionmaker(
+    engine,
     autoflush=False,
-    bind=engine
+    expire_on_commit=False
 )
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Enum
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
-Base = declarative_base()
+from database.connection import Base
 
 
 # ============================
@@ -51,8 +50,8 @@ class User(Base):
     username        = Column(String, unique=True, index=True)
     email           = Column(String, unique=True, index=True)
     hashed_password = Column(String)
-    plan            = Column(String, default="free")   # free | pro | enterprise
-    is_active       = Column(Boolean, default=True)
+    plan            = Column(String, default="free", index=True)   # free | pro | enterprise
+    is_active       = Column(Boolean, default=True, index=True)
     created_at      = Column(DateTime, default=datetime.utcnow)
 
     debates = relationship("DebateHistory", back_populates="user")
@@ -73,6 +72,11 @@ class DebateHistory(Base):
     mode         = Column(String, default="general")
     created_at   = Column(DateTime, default=datetime.utcnow)
 
+    # Covers the per-user, newest-first /history scan (and plain user_id lookups)
+    __table_args__ = (
+        Index("ix_debate_user_id_desc", user_id, id.desc()),
+    )
+
     user = relationship("User", back_populates="debates")
 
 
@@ -84,7 +88,7 @@ class UsageTracking(Base):
     __tablename__ = "usage_tracking"
 
     id                   = Column(Integer, primary_key=True, index=True)
-    user_id              = Column(Integer, ForeignKey("users.id"), unique=True)
+    user_id              = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
 
     # Daily
     debates_today        = Column(Integer, default=0)
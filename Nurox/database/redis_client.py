@@ -0,0 +1,15 @@
+import os
+from redis.asyncio import Redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Optional — without Redis, per-minute rate limiting falls back to the
+# usage_tracking columns in the main database
+redis_client = (
+    Redis.from_url(REDIS_URL, decode_responses=True)
+    if REDIS_URL
+    else None
+)
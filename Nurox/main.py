@@ -1,18 +1,24 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
 import httpx
+import asyncio
 import re
 import numpy as np
 import os
 import logging
 
 from config import GROQ_API_KEY_AI1, GROQ_API_KEY_AI2, MODEL_NAME
-from database.connection import engine
+from database.connection import engine, get_db
+from database.redis_client import redis_client
 from database.models import Base, User, DebateHistory
-from auth.routes import router as auth_router, get_current_user, get_db
+from auth.routes import router as auth_router, get_current_user
 from services.usage_limiter import UsageLimiter
 from admin.routes import router as admin_router
 
@@ -24,10 +30,40 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# -------------------------
+# Lifespan (DB Init / Cleanup)
+# -------------------------
+def init_schema(conn):
+    # One catalog lookup; DDL only runs on first boot or when a table is missing
+    existing = set(inspect(conn).get_table_names())
+
+    if not existing.issuperset(Base.metadata.tables):
+        Base.metadata.create_all(conn)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(init_schema)
+
+    yield
+
+    await http_client.aclose()
+
+    if redis_client is not None:
+        await redis_client.aclose()
+
+    await engine.dispose()
+
+
 # -------------------------
 # App Init
 # -------------------------
-app = FastAPI(title="NUROX V6.3 Intelligence Platform")
+app = FastAPI(
+    title="NUROX V6.3 Intelligence Platform",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 
 # -------------------------
@@ -44,14 +80,6 @@ app.add_middleware(
 )
 
 
-# -------------------------
-# Startup Event (DB Init)
-# -------------------------
-@app.on_event("startup")
-def startup():
-    Base.metadata.create_all(bind=engine)
-
-
 # -------------------------
 # Routers
 # -------------------------
@@ -84,26 +112,42 @@ class DebateResponse(BaseModel):
     usage: dict
 
 
+class HistoryItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    question: Optional[str]
+    final_answer: Optional[str]
+    mode: Optional[str]
+    created_at: Optional[datetime]
+
+
 # -------------------------
 # LLM Caller (Stable Version)
 # -------------------------
+# One pooled client for the app lifetime, so TCP/TLS sessions are reused
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(60.0, connect=10.0),
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+
+
 async def call_llm(api_key, system_prompt, messages, temperature=0.3):
-    timeout = httpx.Timeout(60.0, connect=10.0)
-
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": MODEL_NAME,
-                "messages": [{"role": "system", "content": system_prompt}] + messages,
-                "temperature": temperature,
-                "max_tokens": 900,
-            },
-        )
+    response = await http_client.post(
+        "https://api.groq.com/openai/v1/chat/completions",
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": MODEL_NAME,
+            "messages": [{"role": "system", "content": system_prompt}] + messages,
+            "temperature": temperature,
+            "max_tokens": 900,
+        },
+    )
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail=f"LLM Error: {response.text}")
@@ -119,13 +163,19 @@ async def call_llm(api_key, system_prompt, messages, temperature=0.3):
 # -------------------------
 # Utility Logic
 # -------------------------
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+QUANT_RE = re.compile(r"risk|reward|win rate|break|transaction|slippage", re.IGNORECASE)
+
+# PCG64 generator shared across requests (no per-call construction)
+RNG = np.random.default_rng()
+
+
 def detect_mode(question: str):
-    keywords = ["risk", "reward", "win rate", "break", "transaction", "slippage"]
-    return "quant" if any(k in question.lower() for k in keywords) else "general"
+    return "quant" if QUANT_RE.search(question) else "general"
 
 
 def deterministic_engine(question: str):
-    nums = list(map(float, re.findall(r"\d+\.?\d*", question)))
+    nums = list(map(float, NUMBER_RE.findall(question)))
 
     if len(nums) < 2:
         return None, None
@@ -149,14 +199,45 @@ def deterministic_engine(question: str):
 
 
 def monte_carlo_equity(win_prob, reward_ratio=0.02, risk_ratio=0.01, trades=200):
-    equity_curve = []
-    capital = 1.0
-
-    for _ in range(trades):
-        capital *= (1 + reward_ratio) if np.random.rand() < win_prob else (1 - risk_ratio)
-        equity_curve.append(round(capital, 4))
-
-    return equity_curve
+    wins = RNG.random(trades) < win_prob
+    factors = np.where(wins, 1 + reward_ratio, 1 - risk_ratio)
+    return np.round(np.cumprod(factors), 4).tolist()
+
+
+LLM_ONLY_ANALYSIS = {
+    "deterministic": None,
+    "simulation": None,
+    "simulation_data": None,
+    "risk_alerts": None,
+    "authority": "LLM",
+    "confidence": "Medium",
+}
+
+
+def quant_analysis(question: str):
+    p, ev = deterministic_engine(question)
+
+    if p is None:
+        return LLM_ONLY_ANALYSIS
+
+    equity_curve = monte_carlo_equity(p)
+
+    return dict(
+        LLM_ONLY_ANALYSIS,
+        deterministic=(
+            f"🎯 **Break-even** = {p:.4f} ({p*100:.2f}%) | "
+            f"**EV** = {ev:.4f}"
+        ),
+        simulation=f"📊 **Equity Curve Generated** with {len(equity_curve)} trades.",
+        simulation_data=equity_curve,
+        risk_alerts=(
+            "🟢 **Stable Risk Profile**"
+            if p > 0.4
+            else "🔴 **High Risk Profile**"
+        ),
+        authority="Deterministic + LLM",
+        confidence="High",
+    )
 
 
 PROMPT_BUILDER = (
@@ -178,10 +259,10 @@ PROMPT_AUDITOR = (
 async def debate(
     req: DebateRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     limiter = UsageLimiter(db)
-    usage_info = limiter.check_and_consume(current_user)
+    usage_info = await limiter.check_and_consume(current_user)
 
     question = req.question.strip()
 
@@ -191,42 +272,23 @@ async def debate(
     mode = detect_mode(question)
     transcript = []
 
-    builder = await call_llm(
+    builder_call = call_llm(
         GROQ_API_KEY_AI1,
         PROMPT_BUILDER,
         [{"role": "user", "content": question}],
         0.3,
     )
 
-    transcript.append(DebateMessage(role="🧠 Builder", content=builder))
-
-    deterministic = simulation_block = simulation_data = risk_alerts = None
-    authority = "LLM"
-    confidence = "Medium"
-
     if mode == "quant":
-        p, ev = deterministic_engine(question)
-
-        if p is not None:
-            deterministic = (
-                f"🎯 **Break-even** = {p:.4f} ({p*100:.2f}%) | "
-                f"**EV** = {ev:.4f}"
-            )
-
-            equity_curve = monte_carlo_equity(p)
-            simulation_data = equity_curve
-            simulation_block = (
-                f"📊 **Equity Curve Generated** with {len(equity_curve)} trades."
-            )
-
-            risk_alerts = (
-                "🟢 **Stable Risk Profile**"
-                if p > 0.4
-                else "🔴 **High Risk Profile**"
-            )
+        # Quant block runs in a worker thread while the builder call is in flight
+        builder, analysis = await asyncio.gather(
+            builder_call,
+            asyncio.to_thread(quant_analysis, question),
+        )
+    else:
+        builder, analysis = await builder_call, LLM_ONLY_ANALYSIS
 
-            authority = "Deterministic + LLM"
-            confidence = "High"
+    transcript.append(DebateMessage(role="🧠 Builder", content=builder))
 
     final_answer = await call_llm(
         GROQ_API_KEY_AI2,
@@ -244,53 +306,56 @@ async def debate(
         )
     )
 
-    db.commit()
+    await db.commit()
 
     logger.info(f"Debate executed | User: {current_user.id} | Mode: {mode}")
 
     return DebateResponse(
         mode=mode,
         transcript=transcript,
-        deterministic=deterministic,
-        simulation=simulation_block,
-        simulation_data=simulation_data,
-        risk_alerts=risk_alerts,
         final_answer=final_answer,
-        authority=authority,
-        confidence=confidence,
         usage=usage_info,
+        **analysis,
     )
 
 
 # -------------------------
 # History
 # -------------------------
-@app.get("/history")
-def get_history(
+@app.get("/history", response_model=List[HistoryItem])
+async def get_history(
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    return (
-        db.query(DebateHistory)
-        .filter(DebateHistory.user_id == current_user.id)
-        .order_by(DebateHistory.created_at.desc())
-        .all()
+    # Keyset pagination on id (newest first): pass the last id of the previous page as after_id
+    query = (
+        select(DebateHistory)
+        .where(DebateHistory.user_id == current_user.id)
+        .order_by(DebateHistory.id.desc())
+        .limit(limit)
     )
 
+    if after_id is not None:
+        query = query.where(DebateHistory.id < after_id)
+
+    return (await db.scalars(query)).all()
+
 
 # -------------------------
 # Usage
 # -------------------------
 @app.get("/usage")
-def get_usage(
+async def get_usage(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     from database.models import UsageTracking, PLAN_LIMITS
 
-    tracking = db.query(UsageTracking).filter_by(
-        user_id=current_user.id
-    ).first()
+    tracking = await db.scalar(
+        select(UsageTracking).filter_by(user_id=current_user.id)
+    )
 
     limits = PLAN_LIMITS.get(current_user.plan or "free", {})
 
@@ -0,0 +1,57 @@
+"""
+NUROX V6.3 - Login Attempt Limiter
+"""
+
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from fastapi import HTTPException, status
+
+from database.redis_client import redis_client
+
+
+MAX_FAILED_ATTEMPTS = 5
+WINDOW_SECONDS      = 15 * 60
+
+# Per-process fallback when Redis isn't configured
+_local_failures = TTLCache(maxsize=10000, ttl=WINDOW_SECONDS)
+
+
+class LoginLimiter:
+
+    def __init__(self, ip: str, username: str, redis: Redis | None = redis_client):
+        self.key   = f"login:{ip}:{username}"
+        self.redis = redis
+
+    async def _failures(self) -> int:
+        if self.redis is None:
+            return _local_failures.get(self.key, 0)
+        return int(await self.redis.get(self.key) or 0)
+
+    async def check(self):
+        """Reject before any password hashing once the failure budget is spent."""
+        if await self._failures() >= MAX_FAILED_ATTEMPTS:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "error":     "too_many_login_attempts",
+                    "message":   f"Too many failed logins. Try again in {WINDOW_SECONDS // 60} minutes.",
+                    "resets_in": f"{WINDOW_SECONDS // 60} minutes",
+                }
+            )
+
+    async def record_failure(self):
+        if self.redis is None:
+            _local_failures[self.key] = _local_failures.get(self.key, 0) + 1
+            return
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self.key, 0, ex=WINDOW_SECONDS, nx=True)
+            pipe.incr(self.key)
+            await pipe.execute()
+
+    async def reset(self):
+        if self.redis is None:
+            _local_failures.pop(self.key, None)
+            return
+
+        await self.redis.delete(self.key)
@@ -2,59 +2,162 @@
 NUROX V6.3 - Usage Limiter Service
 """
 
+import time
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from redis.asyncio import Redis
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from database.models import User, UsageTracking, PLAN_LIMITS
+from database.redis_client import redis_client
 
 
-class UsageLimiter:
-
-    def __init__(self, db: Session):
-        self.db = db
-
-    def _get_tracking(self, user: User) -> UsageTracking:
-        tracking = self.db.query(UsageTracking).filter_by(user_id=user.id).first()
-        if not tracking:
-            tracking = UsageTracking(user_id=user.id)
-            self.db.add(tracking)
-            self.db.commit()
-            self.db.refresh(tracking)
-        return tracking
+# Dialect-specific INSERT ... ON CONFLICT constructs
+_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite":     sqlite_insert,
+}
 
-    def _reset_windows(self, tracking: UsageTracking):
-        now = datetime.utcnow()
 
-        if now - tracking.daily_reset_at >= timedelta(hours=24):
-            tracking.debates_today  = 0
-            tracking.daily_reset_at = now
-
-        if now - tracking.monthly_reset_at >= timedelta(days=30):
-            tracking.debates_this_month = 0
-            tracking.monthly_reset_at   = now
+class UsageLimiter:
 
-        if now - tracking.minute_window_start >= timedelta(minutes=1):
-            tracking.requests_this_minute = 0
-            tracking.minute_window_start  = now
+    def __init__(self, db: AsyncSession, redis: Redis | None = redis_client):
+        self.db    = db
+        self.redis = redis
+
+    async def _create_tracking(self, user: User):
+        # First debate only; same transaction as the consume — no separate commit
+        insert = _INSERTS[self.db.bind.dialect.name]
+        await self.db.execute(
+            insert(UsageTracking)
+            .values(user_id=user.id)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+
+    def _windows(self, now: datetime) -> dict:
+        """Counter values as they stand after applying any expired window resets."""
+        expired = {
+            "daily":   UsageTracking.daily_reset_at      <= now - timedelta(hours=24),
+            "monthly": UsageTracking.monthly_reset_at    <= now - timedelta(days=30),
+            "minute":  UsageTracking.minute_window_start <= now - timedelta(minutes=1),
+        }
+        return {
+            "expired":  expired,
+            "today":    case((expired["daily"], 0),   else_=UsageTracking.debates_today),
+            "month":    case((expired["monthly"], 0), else_=UsageTracking.debates_this_month),
+            "minute":   case((expired["minute"], 0),  else_=UsageTracking.requests_this_minute),
+        }
 
-    def check_and_consume(self, user: User) -> dict:
-        plan     = user.plan or "free"
-        limits   = PLAN_LIMITS[plan]
-        tracking = self._get_tracking(user)
+    async def _consume(self, user: User, limits: dict, now: datetime):
+        """
+        Reset expired windows and consume one unit in a single UPDATE.
+        Returns the new (debates_today, debates_this_month), or None when a limit is hit.
+        """
+        w       = self._windows(now)
+        expired = w["expired"]
+
+        conditions = [UsageTracking.user_id == user.id]
+        values = {
+            "debates_today":      w["today"] + 1,
+            "daily_reset_at":     case((expired["daily"], now),   else_=UsageTracking.daily_reset_at),
+            "debates_this_month": w["month"] + 1,
+            "monthly_reset_at":   case((expired["monthly"], now), else_=UsageTracking.monthly_reset_at),
+            "total_debates":      UsageTracking.total_debates + 1,
+        }
 
-        self._reset_windows(tracking)
+        # Per-minute window lives in the DB only when Redis isn't configured
+        if self.redis is None:
+            conditions.append(w["minute"] < limits["rate_per_minute"])
+            values["requests_this_minute"] = w["minute"] + 1
+            values["minute_window_start"]  = case((expired["minute"], now), else_=UsageTracking.minute_window_start)
+
+        if limits["daily_debates"] != -1:
+            conditions.append(w["today"] < limits["daily_debates"])
+        if limits["monthly_debates"] != -1:
+            conditions.append(w["month"] < limits["monthly_debates"])
+
+        stmt = (
+            update(UsageTracking)
+            .where(*conditions)
+            .values(**values)
+            .returning(UsageTracking.debates_today, UsageTracking.debates_this_month)
+            .execution_options(synchronize_session=False)
+        )
+        return (await self.db.execute(stmt)).first()
+
+    async def _read_usage(self, user: User, now: datetime):
+        """Current counters after window resets, or None when the user has no row yet."""
+        w = self._windows(now)
+        return (await self.db.execute(
+            select(
+                w["minute"].label("requests_this_minute"),
+                w["today"].label("debates_today"),
+                w["month"].label("debates_this_month"),
+            ).where(UsageTracking.user_id == user.id)
+        )).first()
+
+    def _rate_limit_error(self, plan: str, limits: dict) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "error":   "rate_limit_exceeded",
+                "message": f"Slow down! Max {limits['rate_per_minute']} requests/minute on {plan} plan.",
+                "upgrade": plan != "enterprise"
+            }
+        )
+
+    async def _check_rate(self, user: User, plan: str, limits: dict):
+        # Fixed one-minute window; the TTL only garbage-collects old buckets
+        key = f"rl:{user.id}:{int(time.time() // 60)}"
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, 60)
+            count, _ = await pipe.execute()
+
+        if count > limits["rate_per_minute"]:
+            raise self._rate_limit_error(plan, limits)
+
+    async def check_and_consume(self, user: User) -> dict:
+        plan   = user.plan or "free"
+        limits = PLAN_LIMITS[plan]
+        now    = datetime.utcnow()
+
+        if self.redis is not None:
+            await self._check_rate(user, plan, limits)
+
+        tracking = None
+        consumed = await self._consume(user, limits, now)
+
+        # No row matched — either a limit was hit or the user has no row yet
+        if consumed is None:
+            tracking = await self._read_usage(user, now)
+
+            if tracking is None:
+                await self._create_tracking(user)
+                consumed = await self._consume(user, limits, now)
+
+        if consumed is not None:
+            await self.db.commit()
+            return {
+                "plan":          plan,
+                "used_today":    consumed.debates_today,
+                "daily_limit":   limits["daily_debates"],
+                "used_monthly":  consumed.debates_this_month,
+                "monthly_limit": limits["monthly_debates"],
+            }
+
+        # Rejected — report which limit was hit from the counters read above
+        if tracking is None:
+            tracking = await self._read_usage(user, now)
+        await self.db.rollback()
 
         # Rate limit per minute
-        if tracking.requests_this_minute >= limits["rate_per_minute"]:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "error":   "rate_limit_exceeded",
-                    "message": f"Slow down! Max {limits['rate_per_minute']} requests/minute on {plan} plan.",
-                    "upgrade": plan != "enterprise"
-                }
-            )
+        if self.redis is None and tracking.requests_this_minute >= limits["rate_per_minute"]:
+            raise self._rate_limit_error(plan, limits)
 
         # Daily limit
         daily_limit = limits["daily_debates"]
@@ -86,17 +189,8 @@ class UsageLimiter:
                 }
             )
 
-        # All good — consume one unit
-        tracking.debates_today        += 1
-        tracking.debates_this_month   += 1
-        tracking.requests_this_minute += 1
-        tracking.total_debates        += 1
-        self.db.commit()
-
-        return {
-            "plan":          plan,
-            "used_today":    tracking.debates_today,
-            "daily_limit":   daily_limit,
-            "used_monthly":  tracking.debates_this_month,
-            "monthly_limit": monthly_limit,
-        }
+        # Unreachable unless limits changed between the UPDATE and the read
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Usage changed concurrently, please retry."
+        )